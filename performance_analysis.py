@@ -1,14 +1,26 @@
 """
 Performance Analysis: Two-Circle Josephus
 ==========================================
-Compares deque-based vs list-based implementations and benchmarks
+Compares deque-based vs list-based implementations (plus a Fenwick tree
+variant whose cost does not grow with k) and benchmarks
 the simulation for various group sizes.
+
+Apart from the optional Numba variant, every implementation is plain
+Python (deques, lists, ints), so the script also runs unmodified under
+PyPy, whose tracing JIT compiles these loops with no extra dependency
+or compile step. That is the recommended fast path:
+
+    pypy performance_analysis.py
 """
 
-import time
+import random
 import statistics
+import timeit
+from array import array
 from collections import deque
 
+from two_circle_josephus import TraceReplay, josephus_table, two_circle_josephus, two_circle_winner
+
 
 # ========== DEQUE IMPLEMENTATION (Original) ==========
 
@@ -31,17 +43,29 @@ def two_circle_josephus_deque(n: int, k: int = 2) -> int:
     if len(circle_b) == 0:
         return circle_a[0]
 
-    while len(circle_a) > 1 or len(circle_b) > 1:
-        if len(circle_a) >= len(circle_b):
-            if len(circle_a) > 1:
-                josephus_eliminate_deque(circle_a, k)
-            if len(circle_b) > 1:
-                josephus_eliminate_deque(circle_b, k)
+    # Track sizes in locals instead of calling len() several times per round.
+    # josephus_eliminate_deque is inlined below to skip a Python call per elimination.
+    la, lb = len(circle_a), len(circle_b)
+    shift = -(k - 1)
+    while la > 1 or lb > 1:
+        if la >= lb:
+            if la > 1:
+                circle_a.rotate(shift)
+                circle_a.popleft()
+                la -= 1
+            if lb > 1:
+                circle_b.rotate(shift)
+                circle_b.popleft()
+                lb -= 1
         else:
-            if len(circle_b) > 1:
-                josephus_eliminate_deque(circle_b, k)
-            if len(circle_a) > 1:
-                josephus_eliminate_deque(circle_a, k)
+            if lb > 1:
+                circle_b.rotate(shift)
+                circle_b.popleft()
+                lb -= 1
+            if la > 1:
+                circle_a.rotate(shift)
+                circle_a.popleft()
+                la -= 1
 
     final = deque([circle_a[0], circle_b[0]])
     josephus_eliminate_deque(final, k)
@@ -50,8 +74,8 @@ def two_circle_josephus_deque(n: int, k: int = 2) -> int:
 
 # ========== LIST IMPLEMENTATION (For comparison) ==========
 
-def josephus_eliminate_list(circle: list, ptr: int, k: int = 2):
-    """Eliminate using list indexing + pop — O(n) per elimination due to shift."""
+def josephus_eliminate_list(circle, ptr: int, k: int = 2):
+    """Eliminate using indexing + pop on a list or array — O(n) per elimination due to shift."""
     idx = (ptr + k - 1) % len(circle)
     eliminated = circle.pop(idx)
     if len(circle) == 0:
@@ -67,24 +91,43 @@ def two_circle_josephus_list(n: int, k: int = 2) -> int:
         return 1
 
     mid = (n + 1) // 2
-    circle_a = list(range(1, mid + 1))
-    circle_b = list(range(mid + 1, n + 1))
-    ptr_a, ptr_b = 0, 0
+    # array('i') stores unboxed 4-byte ints contiguously, so pop(idx) shifts
+    # a compact buffer instead of an array of PyObject pointers
+    circle_a = array('i', range(1, mid + 1))
+    circle_b = array('i', range(mid + 1, n + 1))
 
     if len(circle_b) == 0:
         return circle_a[0]
 
-    while len(circle_a) > 1 or len(circle_b) > 1:
-        if len(circle_a) >= len(circle_b):
-            if len(circle_a) > 1:
+    return _two_circle_inplace(circle_a, circle_b, k)
+
+
+def _two_circle_inplace(circle_a, circle_b, k: int = 2) -> int:
+    """
+    Run the list simulation on caller-provided circles, mutating them in
+    place. Any sequence with pop(idx) works (list, array.array), so a
+    benchmark can allocate the buffers once and reset them between runs.
+    Both circles must be non-empty.
+    """
+    ptr_a, ptr_b = 0, 0
+
+    # Track sizes in locals instead of calling len() several times per round
+    la, lb = len(circle_a), len(circle_b)
+    while la > 1 or lb > 1:
+        if la >= lb:
+            if la > 1:
                 _, ptr_a = josephus_eliminate_list(circle_a, ptr_a, k)
-            if len(circle_b) > 1:
+                la -= 1
+            if lb > 1:
                 _, ptr_b = josephus_eliminate_list(circle_b, ptr_b, k)
+                lb -= 1
         else:
-            if len(circle_b) > 1:
+            if lb > 1:
                 _, ptr_b = josephus_eliminate_list(circle_b, ptr_b, k)
-            if len(circle_a) > 1:
+                lb -= 1
+            if la > 1:
                 _, ptr_a = josephus_eliminate_list(circle_a, ptr_a, k)
+                la -= 1
 
     final = [circle_a[0], circle_b[0]]
     ptr = 0
@@ -92,16 +135,204 @@ def two_circle_josephus_list(n: int, k: int = 2) -> int:
     return final[0]
 
 
+# ========== FENWICK IMPLEMENTATION (k-independent) ==========
+
+def _fenwick_fill(tree) -> None:
+    """Fill a zeroed Fenwick (binary indexed) tree so every slot is alive — O(n)."""
+    size = len(tree) - 1
+    for i in range(1, size + 1):
+        tree[i] += 1
+        parent = i + (i & -i)
+        if parent <= size:
+            tree[parent] += tree[i]
+
+
+def _fenwick_build(size: int) -> list:
+    tree = [0] * (size + 1)
+    _fenwick_fill(tree)
+    return tree
+
+
+def _fenwick_find(tree, rank: int) -> int:
+    """Return the 0-based slot of the (rank+1)-th alive person — O(log n)."""
+    size = len(tree) - 1
+    idx, remaining = 0, rank + 1
+    step = 1
+    while step * 2 <= size:
+        step *= 2
+    while step:
+        nxt = idx + step
+        if nxt <= size and tree[nxt] < remaining:
+            idx = nxt
+            remaining -= tree[nxt]
+        step >>= 1
+    return idx
+
+
+def _fenwick_remove(tree, idx: int) -> None:
+    """Mark 0-based slot idx as eliminated — O(log n)."""
+    i = idx + 1
+    while i < len(tree):
+        tree[i] -= 1
+        i += i & -i
+
+
+def josephus_eliminate_fenwick(tree, ptr: int, count: int, k: int = 2, offset: int = 0):
+    """
+    Eliminate by rank lookup in a Fenwick tree — O(log n) per elimination, any k.
+    `offset` is the number of alive slots before this circle's range in the tree.
+    """
+    rank = (ptr + k - 1) % count
+    idx = _fenwick_find(tree, offset + rank)
+    _fenwick_remove(tree, idx)
+    new_ptr = rank % (count - 1) if count > 1 else 0
+    return idx, new_ptr
+
+
+def two_circle_josephus_fenwick(n: int, k: int = 2) -> int:
+    if n <= 0:
+        raise ValueError("n must be positive")
+    if n == 1:
+        return 1
+
+    mid = (n + 1) // 2
+    # One tree over everyone: slots [0, mid) are circle A, [mid, n) circle B.
+    # A's alive slots all come first, so B's rank r is global rank len_a + r.
+    tree = _fenwick_build(n)
+    len_a, len_b = mid, n - mid
+    ptr_a, ptr_b = 0, 0
+
+    if len_b == 0:
+        return 1
+
+    while len_a > 1 or len_b > 1:
+        if len_a >= len_b:
+            if len_a > 1:
+                _, ptr_a = josephus_eliminate_fenwick(tree, ptr_a, len_a, k)
+                len_a -= 1
+            if len_b > 1:
+                _, ptr_b = josephus_eliminate_fenwick(tree, ptr_b, len_b, k, len_a)
+                len_b -= 1
+        else:
+            if len_b > 1:
+                _, ptr_b = josephus_eliminate_fenwick(tree, ptr_b, len_b, k, len_a)
+                len_b -= 1
+            if len_a > 1:
+                _, ptr_a = josephus_eliminate_fenwick(tree, ptr_a, len_a, k)
+                len_a -= 1
+
+    # Slot i holds person i+1; the two remaining slots are A's then B's survivor
+    final = [_fenwick_find(tree, 0) + 1, _fenwick_find(tree, 1) + 1]
+    josephus_eliminate_list(final, 0, k)
+    return final[0]
+
+
+# ========== NUMBA IMPLEMENTATION (Optional) ==========
+
+def _eliminate_core(tree, ptr, count, k, offset):
+    """Same as josephus_eliminate_fenwick, but calls the jitted helpers."""
+    rank = (ptr + k - 1) % count
+    _fenwick_remove_jit(tree, _fenwick_find_jit(tree, offset + rank))
+    return rank % (count - 1) if count > 1 else 0
+
+
+def _two_circle_core(n, k):
+    """
+    Fenwick simulation over one preallocated int32 buffer shared by both
+    circles, laid out as in two_circle_josephus_fenwick. Written for
+    nopython mode, so it only calls the jitted Fenwick helpers.
+    """
+    mid = (n + 1) // 2
+    tree = np.zeros(n + 1, dtype=np.int32)
+    _fenwick_fill_jit(tree)
+    len_a, len_b = mid, n - mid
+    ptr_a, ptr_b = 0, 0
+
+    while len_a > 1 or len_b > 1:
+        if len_a >= len_b:
+            if len_a > 1:
+                ptr_a = _eliminate_core_jit(tree, ptr_a, len_a, k, 0)
+                len_a -= 1
+            if len_b > 1:
+                ptr_b = _eliminate_core_jit(tree, ptr_b, len_b, k, len_a)
+                len_b -= 1
+        else:
+            if len_b > 1:
+                ptr_b = _eliminate_core_jit(tree, ptr_b, len_b, k, len_a)
+                len_b -= 1
+            if len_a > 1:
+                ptr_a = _eliminate_core_jit(tree, ptr_a, len_a, k, 0)
+                len_a -= 1
+
+    # Final round [A, B]: even k eliminates B, odd k eliminates A
+    return _fenwick_find_jit(tree, 0 if k % 2 == 0 else 1) + 1
+
+
+# Set by _get_jit(); the kernel above resolves them as globals when numba compiles it
+np = None
+_fenwick_fill_jit = None
+_fenwick_find_jit = None
+_fenwick_remove_jit = None
+_eliminate_core_jit = None
+_jit_cache = None  # compiled _two_circle_core
+_jit_unavailable = False  # set once the numpy/numba import has failed
+
+
+def _get_jit():
+    """
+    Import numpy/numba and compile the kernel on first use, so importing
+    this module stays cheap. Returns None if they are not installed
+    (usually the case on PyPy); a failed import is remembered and not retried.
+    """
+    global _jit_cache, _jit_unavailable, np
+    global _fenwick_fill_jit, _fenwick_find_jit, _fenwick_remove_jit, _eliminate_core_jit
+    if _jit_cache is None:
+        if _jit_unavailable:
+            return None
+        try:
+            import numpy
+            from numba import njit
+        except ImportError:
+            _jit_unavailable = True
+            return None
+        np = numpy
+        _fenwick_fill_jit = njit(cache=True)(_fenwick_fill)
+        _fenwick_find_jit = njit(cache=True)(_fenwick_find)
+        _fenwick_remove_jit = njit(cache=True)(_fenwick_remove)
+        _eliminate_core_jit = njit(cache=True)(_eliminate_core)
+        _jit_cache = njit(cache=True)(_two_circle_core)
+    return _jit_cache
+
+
+def two_circle_josephus_numba(n: int, k: int = 2) -> int:
+    if n <= 0:
+        raise ValueError("n must be positive")
+    core = _get_jit()
+    if core is None:
+        raise ImportError("two_circle_josephus_numba requires numpy and numba")
+    if n == 1:
+        return 1
+    return int(core(n, k))
+
+
 # ========== BENCHMARKING ==========
 
 def benchmark(func, n, k=2, trials=5):
-    """Run func(n, k) multiple times and return timing stats."""
-    times = []
-    for _ in range(trials):
-        start = time.perf_counter()
-        func(n, k)
-        end = time.perf_counter()
-        times.append(end - start)
+    """
+    Time func(n, k) with timeit and return per-call timing stats.
+
+    autorange() picks a loop count so one repeat takes at least 0.2s, so
+    tiny n is not swamped by timer resolution and large n is not over-run.
+    Report 'min': it is the run least disturbed by other processes.
+    """
+    return _time_call(lambda: func(n, k), trials)
+
+
+def _time_call(call, trials):
+    """Time a zero-argument callable as described in benchmark()."""
+    timer = timeit.Timer(call)
+    loops, _ = timer.autorange()
+    times = [total / loops for total in timer.repeat(repeat=trials, number=loops)]
     return {
         'mean': statistics.mean(times),
         'median': statistics.median(times),
@@ -111,19 +342,119 @@ def benchmark(func, n, k=2, trials=5):
     }
 
 
-def verify_correctness():
-    """Verify both implementations produce the same results."""
-    print("Verifying correctness (deque vs list)...")
+def benchmark_pooled(n, k=2, trials=5):
+    """
+    Like benchmark(two_circle_josephus_list, ...), which allocates fresh
+    array('i') circles on every call, but the two circles here are
+    allocated once up front. Each timed call resets them with a memcpy
+    from a pristine copy, so no containers are created while timing.
+    """
+    mid = (n + 1) // 2
+    initial_a = array('i', range(1, mid + 1))
+    initial_b = array('i', range(mid + 1, n + 1))
+    circle_a = array('i', initial_a)
+    circle_b = array('i', initial_b)
+
+    def run():
+        circle_a[:] = initial_a
+        circle_b[:] = initial_b
+        return _two_circle_inplace(circle_a, circle_b, k)
+
+    return _time_call(run, trials)
+
+
+def verify_correctness(max_n=100, samples=10, seed=0):
+    """
+    Spot-check every implementation against the closed form. The original
+    Josephus table is built once per k, so each circle's survivor is a
+    lookup and two_circle_winner only plays the final round. Only
+    `samples` randomly chosen n per k are simulated.
+    """
+    print("Verifying correctness (deque, list, fenwick vs Josephus table)...")
+    implementations = {
+        'deque': two_circle_josephus_deque,
+        'list': two_circle_josephus_list,
+        'fenwick': two_circle_josephus_fenwick,
+    }
+    if _get_jit() is not None:
+        implementations['numba'] = two_circle_josephus_numba
+
+    rng = random.Random(seed)
     all_match = True
-    for n in range(1, 101):
-        for k in [2, 3, 5, 7]:
-            d = two_circle_josephus_deque(n, k)
-            l = two_circle_josephus_list(n, k)
-            if d != l:
-                print(f"  MISMATCH: n={n}, k={k}: deque={d}, list={l}")
+    for k in [2, 3, 5, 7]:
+        J = josephus_table(max_n, k)
+        for n in sorted(rng.sample(range(1, max_n + 1), samples)):
+            expected = two_circle_winner(n, k, J)
+            for name, func in implementations.items():
+                got = func(n, k)
+                if got != expected:
+                    print(f"  MISMATCH: n={n}, k={k}: {name}={got}, expected={expected}")
+                    all_match = False
+    if all_match:
+        print(f"All implementations match the Josephus table on {samples} spot checks "
+              f"per k (n<={max_n}, k=2,3,5,7)\n")
+    return all_match
+
+
+def _simulated_states(n: int, k: int = 2):
+    """
+    Return [(A, B), ...], the circles after every elimination of a direct
+    simulation, in the same order and format as the steps of a trace.
+    """
+    mid = (n + 1) // 2
+    circle_a = deque(range(1, mid + 1))
+    circle_b = deque(range(mid + 1, n + 1))
+    states = []
+    while len(circle_a) > 1 or len(circle_b) > 1:
+        if len(circle_a) >= len(circle_b):
+            if len(circle_a) > 1:
+                josephus_eliminate_deque(circle_a, k)
+                states.append((list(circle_a), list(circle_b)))
+            if len(circle_b) > 1:
+                josephus_eliminate_deque(circle_b, k)
+                states.append((list(circle_a), list(circle_b)))
+        else:
+            if len(circle_b) > 1:
+                josephus_eliminate_deque(circle_b, k)
+                states.append((list(circle_a), list(circle_b)))
+            if len(circle_a) > 1:
+                josephus_eliminate_deque(circle_a, k)
+                states.append((list(circle_a), list(circle_b)))
+    final = deque([circle_a[0], circle_b[0]])
+    josephus_eliminate_deque(final, k)
+    states.append((list(final), []))
+    return states
+
+
+def verify_trace_replay(max_n: int = 40, ks=(1, 2, 3, 4, 7, 13), seeks: int = 20, seed: int = 0):
+    """
+    Check that TraceReplay rebuilds the same circles as a direct simulation,
+    stepping forward, backward and to random steps, for n=2..max_n.
+    """
+    print("Verifying trace replay against direct simulation...")
+    rng = random.Random(seed)
+    all_match = True
+    for k in ks:
+        for n in range(2, max_n + 1):
+            _, steps = two_circle_josephus(n, k, trace=True)
+            expected = _simulated_states(n, k)
+            replay = TraceReplay(steps)
+            if replay.num_steps != len(expected):
+                print(f"  MISMATCH: n={n}, k={k}: {replay.num_steps} steps, expected {len(expected)}")
                 all_match = False
+                continue
+            last = len(expected) - 1
+            order = list(range(len(expected))) + list(range(last, -1, -1))
+            order += [rng.randint(0, last) for _ in range(seeks)]
+            for i in order:
+                replay.seek(i + 1)
+                if (list(replay.A), list(replay.B)) != expected[i]:
+                    print(f"  MISMATCH: n={n}, k={k}, step {i + 1}: "
+                          f"replay={list(replay.A)}/{list(replay.B)}, expected={expected[i]}")
+                    all_match = False
+                    break
     if all_match:
-        print("Both implementations produce identical results for n=1..100, k=2,3,5,7\n")
+        print(f"Trace replay matches the simulation for n=2..{max_n}, k={','.join(map(str, ks))}\n")
     return all_match
 
 
@@ -139,14 +470,11 @@ def run_benchmarks():
     results = []
 
     for n in test_sizes:
-        """Adjust trials for large n"""
-        t = trials if n <= 10000 else 3
-
-        deque_stats = benchmark(two_circle_josephus_deque, n, k, t)
-        list_stats = benchmark(two_circle_josephus_list, n, k, t)
+        deque_stats = benchmark(two_circle_josephus_deque, n, k, trials)
+        list_stats = benchmark(two_circle_josephus_list, n, k, trials)
 
-        deque_ms = deque_stats['mean'] * 1000
-        list_ms = list_stats['mean'] * 1000
+        deque_ms = deque_stats['min'] * 1000
+        list_ms = list_stats['min'] * 1000
         speedup = list_ms / deque_ms if deque_ms > 0 else float('inf')
         winner = "Deque" if deque_ms < list_ms else "List"
 
@@ -160,20 +488,58 @@ def run_benchmarks():
     return results
 
 
+def run_pooled_benchmark():
+    """
+    Benchmark the array-backed list simulation with circles allocated on
+    every call (two_circle_josephus_list) vs allocated once and reset.
+    """
+    print(f"{'n':>8} | {'Fresh (ms)':>12} | {'Pooled (ms)':>12} | {'Speedup':>10}")
+    print("-" * 51)
+
+    for n in [100, 1000, 10000]:
+        fresh_ms = benchmark(two_circle_josephus_list, n, 2, 5)['min'] * 1000
+        pooled_ms = benchmark_pooled(n, 2, 5)['min'] * 1000
+        speedup = fresh_ms / pooled_ms if pooled_ms > 0 else float('inf')
+
+        print(f"{n:>8} | {fresh_ms:>11.3f} | {pooled_ms:>11.3f} | {speedup:>9.2f}x")
+
+
+def run_numba_benchmark():
+    """Benchmark the JIT-compiled Fenwick simulation against the deque version."""
+    if _get_jit() is None:
+        print("numba is not installed; skipping JIT benchmark")
+        return
+
+    two_circle_josephus_numba(10, 2)  # compile outside the timed runs
+
+    print(f"{'n':>8} | {'Deque (ms)':>12} | {'Numba (ms)':>12} | {'Speedup':>10}")
+    print("-" * 51)
+
+    for n in [1000, 10000, 50000]:
+        deque_ms = benchmark(two_circle_josephus_deque, n, 2, 5)['min'] * 1000
+        numba_ms = benchmark(two_circle_josephus_numba, n, 2, 5)['min'] * 1000
+        speedup = deque_ms / numba_ms if numba_ms > 0 else float('inf')
+
+        print(f"{n:>8} | {deque_ms:>11.3f} | {numba_ms:>11.3f} | {speedup:>9.2f}x")
+
+
 def run_k_impact_benchmark():
     """Benchmark how different k values affect performance."""
-    print(f"\n{'k':>4} | {'n=1000 Deque (ms)':>18} | {'n=1000 List (ms)':>18} | {'Speedup':>10}")
-    print("-" * 58)
+    print(f"\n{'k':>4} | {'n=1000 Deque (ms)':>18} | {'n=1000 List (ms)':>18} | "
+          f"{'n=1000 Fenwick (ms)':>20} | {'Speedup':>10}")
+    print("-" * 81)
 
     for k in [2, 3, 5, 10, 50, 100]:
         deque_stats = benchmark(two_circle_josephus_deque, 1000, k, 5)
         list_stats = benchmark(two_circle_josephus_list, 1000, k, 5)
+        fenwick_stats = benchmark(two_circle_josephus_fenwick, 1000, k, 5)
 
-        deque_ms = deque_stats['mean'] * 1000
-        list_ms = list_stats['mean'] * 1000
+        deque_ms = deque_stats['min'] * 1000
+        list_ms = list_stats['min'] * 1000
+        fenwick_ms = fenwick_stats['min'] * 1000
         speedup = list_ms / deque_ms if deque_ms > 0 else float('inf')
 
-        print(f"{k:>4} | {deque_ms:>17.3f} | {list_ms:>17.3f} | {speedup:>9.2f}x")
+        print(f"{k:>4} | {deque_ms:>17.3f} | {list_ms:>17.3f} | {fenwick_ms:>19.3f} | {speedup:>9.2f}x")
 
 
 def print_complexity_analysis():
@@ -191,11 +557,20 @@ DEQUE-BASED IMPLEMENTATION:
   - Space: O(n)
 
 LIST-BASED IMPLEMENTATION:
-  - Each elimination: O(1) for indexing + O(n) for list.pop (shifts elements)
+  - Circles are array('i') buffers of 4-byte ints rather than lists of
+    boxed int objects
+  - Each elimination: O(1) for indexing + O(n) for pop (shifts elements)
   - Total eliminations per circle: ~n/2
   - Total time: O(n²)
   - Space: O(n)
 
+FENWICK-BASED IMPLEMENTATION:
+  - One Fenwick tree over all n people counts who is still alive;
+    circle A is the first ceil(n/2) slots, circle B the rest
+  - Each elimination: O(log n) rank lookup + O(log n) update, for any k
+  - Total time: O(n log n), with no k factor
+  - Space: O(n)
+
 COMPARISON:
   - For small n (< 100): Both are fast, difference is negligible
   - For medium n (100 - 1000): Deque starts to show advantage
@@ -221,6 +596,7 @@ if __name__ == "__main__":
 
     # Step 1: Verify correctness
     verify_correctness()
+    verify_trace_replay()
 
     # Step 2: Benchmark deque vs list
     print("--- Benchmark: Deque vs List (k=2) ---")
@@ -230,5 +606,13 @@ if __name__ == "__main__":
     print("\n--- Benchmark: Impact of k Value (n=1000) ---")
     run_k_impact_benchmark()
 
-    # Step 4: Complexity analysis
+    # Step 4: Preallocated buffers
+    print("\n--- Benchmark: Fresh vs Pooled Array Buffers (list simulation, k=2) ---")
+    run_pooled_benchmark()
+
+    # Step 5: JIT-compiled Fenwick simulation (requires numba)
+    print("\n--- Benchmark: Deque vs Numba (k=2) ---")
+    run_numba_benchmark()
+
+    # Step 6: Complexity analysis
     print_complexity_analysis()
@@ -8,28 +8,102 @@ When one person remains per circle, a final Josephus round determines the winner
 Step size k = 2 throughout.
 """
 
+import sys
+from array import array
 from collections import deque
+from functools import lru_cache
 
 
-def _snapshot(circle_a: deque, circle_b: deque, turn: str, eliminated: int, phase: str = "main"):
+PHASES = ("main", "final")
+
+
+def _new_trace():
     """
-    Create a trace snapshot AFTER an elimination.
+    Create an empty trace: parallel arrays with one entry per elimination.
 
     Conventions:
-    - 'A' and 'B' store the current deque order for each circle.
-    - The "pointer" is implicitly the FRONT of each deque (index 0 in the list).
-    - 'turn' indicates which circle performed the elimination ("A" or "B").
-    - 'phase' is "main" during alternating eliminations, and "final" for the head-to-head.
+    - 'turn' holds ord("A") or ord("B"), the circle that performed the elimination.
+    - 'eliminated' holds the eliminated person ID.
+    - 'index' is the position of the eliminated person counted from the
+      FRONT of that circle's deque (the "pointer") just before it was removed.
+    - 'phase' indexes PHASES: "main" during alternating eliminations, and
+      "final" for the head-to-head.
+
+    Circle contents are not stored; starting from A = 1..ceil(n/2) and
+    B = ceil(n/2)+1..n, replaying the steps with rotate(-index) + popleft()
+    reproduces the state after any step (see TracePlayer).
     """
     return {
-        "turn": turn,              # A or B
-        "eliminated": eliminated,  # eliminated person ID
-        "A": list(circle_a),       # Circle A state (pointer at index 0)
-        "B": list(circle_b),       # Circle B state (pointer at index 0)
-        "phase": phase,            # main or final
+        "turn": bytearray(),
+        "eliminated": array("i"),
+        "index": array("i"),
+        "phase": bytearray(),
     }
 
 
+def _record_step(steps, turn: str, eliminated: int, index: int, phase: str = "main"):
+    """Append one elimination to a trace created by _new_trace."""
+    steps["turn"].append(ord(turn))
+    steps["eliminated"].append(eliminated)
+    steps["index"].append(index)
+    steps["phase"].append(PHASES.index(phase))
+
+
+class TraceReplay:
+    """
+    Rebuild the circles at any point of a trace from _new_trace.
+
+    A and B hold the circles (pointer at index 0) after the first
+    `applied` steps. seek() replays steps forward with rotate(-index) +
+    popleft() and undoes them with appendleft() + rotate(index), so moving
+    one step costs one elimination rather than a stored copy of both
+    circles. n is not stored in the trace; it is always num_steps + 1.
+    """
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.num_steps = len(steps["eliminated"])
+        self.n = self.num_steps + 1
+        self.reset()
+
+    def reset(self):
+        mid = (self.n + 1) // 2
+        self.A = deque(range(1, mid + 1))
+        self.B = deque(range(mid + 1, self.n + 1))
+        self.applied = 0  # number of steps reflected in A and B
+
+    def _apply(self, i):
+        eliminated = self.steps["eliminated"][i]
+        if PHASES[self.steps["phase"][i]] == "final":
+            survivors = [self.A[0], self.B[0]]
+            survivors.remove(eliminated)
+            self.A, self.B = deque(survivors), deque()
+        else:
+            circle = self.A if self.steps["turn"][i] == ord("A") else self.B
+            circle.rotate(-self.steps["index"][i])
+            circle.popleft()
+
+    def _undo(self, i):
+        eliminated = self.steps["eliminated"][i]
+        if PHASES[self.steps["phase"][i]] == "final":
+            # Circle A's IDs are always smaller than Circle B's
+            pair = sorted([self.A[0], eliminated])
+            self.A, self.B = deque(pair[:1]), deque(pair[1:])
+        else:
+            circle = self.A if self.steps["turn"][i] == ord("A") else self.B
+            circle.appendleft(eliminated)
+            circle.rotate(self.steps["index"][i])
+
+    def seek(self, count):
+        """Move to the state after the first `count` steps."""
+        while self.applied < count:
+            self._apply(self.applied)
+            self.applied += 1
+        while self.applied > count:
+            self.applied -= 1
+            self._undo(self.applied)
+
+
 def josephus_eliminate(circle: deque, k: int = 2) -> int:
     """
     Eliminate one person from a circle using the Josephus rule.
@@ -47,6 +121,58 @@ def josephus_eliminate(circle: deque, k: int = 2) -> int:
     return eliminated
 
 
+def _josephus_survivor(m: int, k: int = 2) -> int:
+    """
+    Return the 1-indexed survivor of a classic Josephus circle of size m.
+
+    For k=2 this is the closed form J(m, 2) = 2*L + 1 where m = 2^p + L,
+    i.e. m's binary representation rotated left by one bit. Other k fall
+    back to the iterative recurrence. An empty circle (m=0) gives 0.
+    """
+    if m == 0:
+        return 0
+    if k == 2:
+        p = m.bit_length() - 1
+        return 2 * (m - (1 << p)) + 1
+    return original_josephus(m, k)
+
+
+def two_circle_winner(n: int, k: int = 2, J=None) -> int:
+    """
+    Return the two-circle winner without simulating the elimination rounds.
+
+    Each circle is an independent classic Josephus circle, so its survivor
+    is J(ceil(n/2)) for Circle A and ceil(n/2) + J(floor(n/2)) for Circle B.
+    The final head-to-head between them is then actually played.
+
+    Args:
+        n: total number of people (n >= 1)
+        k: step size
+        J: optional josephus_table(max_n, k) with max_n >= ceil(n/2); the
+           survivors are looked up in it instead of being computed
+    """
+    mid = (n + 1) // 2
+    if J is None:
+        survivor_a, survivor_b = _josephus_survivor(mid, k), _josephus_survivor(n - mid, k)
+    else:
+        survivor_a, survivor_b = J[mid], J[n - mid]
+    # For n=1, Circle B is empty (J = 0) and Circle A's only person plays itself
+    final_circle = deque([survivor_a, mid + survivor_b])
+    josephus_eliminate(final_circle, k)
+    return final_circle[0]
+
+
+@lru_cache(maxsize=None)
+def _two_circle_josephus_cached(n: int, k: int) -> int:
+    """
+    Closed-form two-circle winner for n >= 1, memoized per (n, k).
+
+    Only repeat calls to two_circle_josephus with the same (n, k) hit the
+    cache; the analyses read a josephus_table instead and never go through it.
+    """
+    return two_circle_winner(n, k)
+
+
 def two_circle_josephus(n: int, k: int = 2, verbose: bool = False, trace: bool = False):
     """
     Simulate the two-circle Josephus variation.
@@ -55,17 +181,36 @@ def two_circle_josephus(n: int, k: int = 2, verbose: bool = False, trace: bool =
         n: total number of people (numbered 1 to n)
         k: step size for elimination (default 2)
         verbose: if True, print step-by-step eliminations
-        trace: if True, return (winner, steps) where steps is a list of snapshots
+        trace: if True, return (winner, steps) where steps is a trace from _new_trace
 
     Returns:
         If trace=False: the number of the winning person (int)
         If trace=True:  (winner, steps)
+
+    When neither verbose nor trace is set the winner is computed directly
+    by two_circle_winner and memoized, so asking for the same (n, k) again
+    is a lookup. Otherwise the rounds are simulated.
     """
     if n <= 0:
         raise ValueError("n must be a positive integer")
 
-    # Trace list (only used if trace=True)
-    steps = [] if trace else None
+    if not verbose and not trace:
+        return _two_circle_josephus_cached(n, k)
+    return _simulate_two_circle(n, k, verbose=verbose, trace=trace)
+
+
+def _simulate_two_circle(n: int, k: int = 2, verbose: bool = False, trace: bool = False):
+    """
+    Play out the two-circle variation round by round with deques.
+
+    Takes the same arguments and returns the same values as
+    two_circle_josephus, but never uses the closed form, so analyses can
+    test the closed form against it.
+    """
+    # Trace arrays (only used if trace=True)
+    steps = _new_trace() if trace else None
+    # Verbose output is buffered and written once at the end
+    out = [] if verbose else None
 
     if n == 1:
         if verbose:
@@ -78,9 +223,9 @@ def two_circle_josephus(n: int, k: int = 2, verbose: bool = False, trace: bool =
     circle_b = deque(range(mid + 1, n + 1))
 
     if verbose:
-        print(f"\nn={n}, k={k}")
-        print(f"  Circle A ({len(circle_a)}): {list(circle_a)}")
-        print(f"  Circle B ({len(circle_b)}): {list(circle_b)}")
+        out.append(f"\nn={n}, k={k}\n")
+        out.append(f"  Circle A ({len(circle_a)}): {list(circle_a)}\n")
+        out.append(f"  Circle B ({len(circle_b)}): {list(circle_b)}\n")
 
     # If circle_b is empty (only possible when n=1, already handled), just return circle_a[0]
     if len(circle_b) == 0:
@@ -90,7 +235,7 @@ def two_circle_josephus(n: int, k: int = 2, verbose: bool = False, trace: bool =
     round_num = 1
     while len(circle_a) > 1 or len(circle_b) > 1:
         if verbose:
-            print(f"  Round {round_num}:", end="")
+            out.append(f"  Round {round_num}:")
 
         # Determine order: larger circle goes first (Circle A goes first on tie)
         if len(circle_a) >= len(circle_b):
@@ -98,44 +243,48 @@ def two_circle_josephus(n: int, k: int = 2, verbose: bool = False, trace: bool =
             if len(circle_a) > 1:
                 eliminated_a = josephus_eliminate(circle_a, k)
                 if trace:
-                    steps.append(_snapshot(circle_a, circle_b, turn="A", eliminated=eliminated_a, phase="main"))
+                    index = (k - 1) % (len(circle_a) + 1)
+                    _record_step(steps, turn="A", eliminated=eliminated_a, index=index, phase="main")
                 if verbose:
-                    print(f" Circle A eliminates {eliminated_a} → {list(circle_a)}", end="")
+                    out.append(f" Circle A eliminates {eliminated_a} → {list(circle_a)}")
             elif verbose:
-                print(f" Circle A has 1 left ({circle_a[0]}), skips", end="")
+                out.append(f" Circle A has 1 left ({circle_a[0]}), skips")
 
             # Then Circle B
             if len(circle_b) > 1:
                 eliminated_b = josephus_eliminate(circle_b, k)
                 if trace:
-                    steps.append(_snapshot(circle_a, circle_b, turn="B", eliminated=eliminated_b, phase="main"))
+                    index = (k - 1) % (len(circle_b) + 1)
+                    _record_step(steps, turn="B", eliminated=eliminated_b, index=index, phase="main")
                 if verbose:
-                    print(f" | Circle B eliminates {eliminated_b} → {list(circle_b)}", end="")
+                    out.append(f" | Circle B eliminates {eliminated_b} → {list(circle_b)}")
             elif verbose:
-                print(f" | Circle B has 1 left ({circle_b[0]}), skips", end="")
+                out.append(f" | Circle B has 1 left ({circle_b[0]}), skips")
         else:
             # Circle B goes first (strictly larger)
             if len(circle_b) > 1:
                 eliminated_b = josephus_eliminate(circle_b, k)
                 if trace:
-                    steps.append(_snapshot(circle_a, circle_b, turn="B", eliminated=eliminated_b, phase="main"))
+                    index = (k - 1) % (len(circle_b) + 1)
+                    _record_step(steps, turn="B", eliminated=eliminated_b, index=index, phase="main")
                 if verbose:
-                    print(f" Circle B eliminates {eliminated_b} → {list(circle_b)}", end="")
+                    out.append(f" Circle B eliminates {eliminated_b} → {list(circle_b)}")
             elif verbose:
-                print(f" Circle B has 1 left ({circle_b[0]}), skips", end="")
+                out.append(f" Circle B has 1 left ({circle_b[0]}), skips")
 
             # Then Circle A
             if len(circle_a) > 1:
                 eliminated_a = josephus_eliminate(circle_a, k)
                 if trace:
-                    steps.append(_snapshot(circle_a, circle_b, turn="A", eliminated=eliminated_a, phase="main"))
+                    index = (k - 1) % (len(circle_a) + 1)
+                    _record_step(steps, turn="A", eliminated=eliminated_a, index=index, phase="main")
                 if verbose:
-                    print(f" | Circle A eliminates {eliminated_a} → {list(circle_a)}", end="")
+                    out.append(f" | Circle A eliminates {eliminated_a} → {list(circle_a)}")
             elif verbose:
-                print(f" | Circle A has 1 left ({circle_a[0]}), skips", end="")
+                out.append(f" | Circle A has 1 left ({circle_a[0]}), skips")
 
         if verbose:
-            print()
+            out.append("\n")
         round_num += 1
 
     # Final round: one person in each circle
@@ -143,25 +292,21 @@ def two_circle_josephus(n: int, k: int = 2, verbose: bool = False, trace: bool =
     survivor_b = circle_b[0]
 
     if verbose:
-        print(f"  Final round: Circle A survivor = {survivor_a}, Circle B survivor = {survivor_b}")
-        print(f"  Mini-circle: [{survivor_a}, {survivor_b}] (Circle A person first)")
+        out.append(f"  Final round: Circle A survivor = {survivor_a}, Circle B survivor = {survivor_b}\n")
+        out.append(f"  Mini-circle: [{survivor_a}, {survivor_b}] (Circle A person first)\n")
 
     final_circle = deque([survivor_a, survivor_b])
     eliminated_final = josephus_eliminate(final_circle, k)
     winner = final_circle[0]
 
     if trace:
-        # Represent final as a last step. We keep the winner in A for simplicity.
-        steps.append({
-            "turn": "A", # Circle A considered first in the mini-circle
-            "eliminated": eliminated_final,
-            "A": [winner],
-            "B": [],
-            "phase": "final",
-        })
+        # Represent final as a last step; Circle A's survivor is first in the mini-circle.
+        # When replayed, the winner is kept in A for simplicity.
+        _record_step(steps, turn="A", eliminated=eliminated_final, index=(k - 1) % 2, phase="final")
 
     if verbose:
-        print(f"  Eliminates {eliminated_final} → Winner: {winner}")
+        out.append(f"  Eliminates {eliminated_final} → Winner: {winner}\n")
+        sys.stdout.write("".join(out))
 
     return (winner, steps) if trace else winner
 
@@ -181,17 +326,35 @@ def original_josephus(n: int, k: int = 2) -> int:
     return pos + 1
 
 
+def josephus_table(max_n: int, k: int = 2) -> list:
+    """
+    Solve the original Josephus problem for every size 1 to max_n in one pass.
+
+    Returns a list J where J[m] is the 1-indexed survivor for m people,
+    built with the same recurrence as original_josephus. J[0] = 0 is the
+    survivor value for an empty circle, which two_circle_winner relies on
+    for n=1.
+    """
+    table = [0, 1]
+    pos = 0
+    for i in range(2, max_n + 1):
+        pos = (pos + k) % i
+        table.append(pos + 1)
+    return table
+
+
 def print_results_table(max_n: int = 30):
     """
     Print a comparison table of the two-circle variant vs. the original
     Josephus problem for group sizes 1 to max_n.
     """
-    print(f"{'n':>4} | {'Two-Circle Winner':>18} | {'Original Josephus':>18}")
-    print("-" * 47)
+    J = josephus_table(max_n)
+    lines = [f"{'n':>4} | {'Two-Circle Winner':>18} | {'Original Josephus':>18}", "-" * 47]
     for n in range(1, max_n + 1):
         tc_winner = two_circle_josephus(n)
-        orig_winner = original_josephus(n)
-        print(f"{n:>4} | {tc_winner:>18} | {orig_winner:>18}")
+        orig_winner = J[n]
+        lines.append(f"{n:>4} | {tc_winner:>18} | {orig_winner:>18}")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def analyze_pattern(max_n: int = 30):
@@ -204,11 +367,11 @@ def analyze_pattern(max_n: int = 30):
     print("=" * 60)
 
     two_circle_winners = []
-    original_winners = []
+    J = josephus_table(max_n)
+    original_winners = J[1:]
 
     for n in range(1, max_n + 1):
-        two_circle_winners.append(two_circle_josephus(n))
-        original_winners.append(original_josephus(n))
+        two_circle_winners.append(_simulate_two_circle(n))
 
     # Check how often the two-circle winner matches the original
     matches = sum(1 for i in range(max_n)
@@ -230,12 +393,13 @@ def analyze_pattern(max_n: int = 30):
         print("goes first with k=2 and 2 people, which always favors the first person.")
 
     # Look for power-of-2 patterns (like original Josephus)
-    print("\n--- Two-Circle Winners by n ---")
+    lines = ["\n--- Two-Circle Winners by n ---"]
     for n in range(1, max_n + 1):
         mid = (n + 1) // 2
         winner = two_circle_winners[n - 1]
         # The winner's position within Circle A
-        print(f"  n={n:>2}, CircleA size={mid:>2}, Winner={winner:>2} (position {winner} in Circle A)")
+        lines.append(f"  n={n:>2}, CircleA size={mid:>2}, Winner={winner:>2} (position {winner} in Circle A)")
+    sys.stdout.write("\n".join(lines) + "\n")
 
     # Original Josephus pattern reminder
     print("\n--- Original Josephus Pattern (for reference) ---")
@@ -256,7 +420,7 @@ def analyze_pattern(max_n: int = 30):
     for n in range(1, max_n + 1):
         mid = (n + 1) // 2
         tc_winner = two_circle_winners[n - 1]
-        expected = original_josephus(mid)  # position in circle of size mid
+        expected = J[mid]  # position in circle of size mid
 
         if tc_winner != expected:
             conjecture_holds = False
@@ -286,9 +450,12 @@ def analyze_odd_vs_even_k(max_n: int = 30, max_k: int = 10):
     for k in range(2, max_k + 1):
         a_wins = 0
         b_wins = 0
+        # One Josephus table per k; each circle's survivor is then a lookup,
+        # and only the final head-to-head is played
+        J = josephus_table(max_n, k)
         for n in range(2, max_n + 1):
             mid = (n + 1) // 2
-            winner = two_circle_josephus(n, k=k)
+            winner = two_circle_winner(n, k, J)
             if winner <= mid:
                 a_wins += 1
             else:
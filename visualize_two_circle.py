@@ -1,8 +1,9 @@
-import math
 import sys
-import matplotlib.pyplot as plt
-from matplotlib.widgets import Button
-from two_circle_josephus import two_circle_josephus
+from two_circle_josephus import PHASES, TraceReplay, two_circle_josephus
+
+# numpy and matplotlib are imported inside the functions that use them, so
+# importing this module (e.g. for circle_positions) stays fast. Python
+# caches modules after the first import, so repeat imports are cheap.
 
 
 # ----------------------------
@@ -11,43 +12,65 @@ from two_circle_josephus import two_circle_josephus
 def circle_positions(n, center, radius):
     if n == 0:
         return []
+    import numpy as np
+
     cx, cy = center
-    positions = []
-    for i in range(n):
-        angle = (math.pi / 2) - (2 * math.pi * i / n)
-        x = cx + radius * math.cos(angle)
-        y = cy + radius * math.sin(angle)
-        positions.append((x, y))
-    return positions
+    angles = np.pi / 2 - 2 * np.pi * np.arange(n) / n
+    xs = cx + radius * np.cos(angles)
+    ys = cy + radius * np.sin(angles)
+    return list(zip(xs.tolist(), ys.tolist()))
 
 
 # ----------------------------
 # Draw One Circle
 # ----------------------------
-def draw_circle(ax, people, center, radius, label, active):
-    outline = plt.Circle(center, radius, fill=False, linewidth=3 if active else 1.5)
+def make_circle_artists(ax, capacity, center, radius):
+    """
+    Create every artist one circle will ever need, sized for its largest
+    state. update_circle then only moves, relabels and hides them.
+    """
+    import numpy as np
+    from matplotlib.patches import Circle
+
+    outline = Circle(center, radius, fill=False, linewidth=1.5)
     ax.add_patch(outline)
 
     cx, cy = center
-    ax.text(cx, cy + radius + 0.35,
-            label + (" (TURN)" if active else ""),
-            ha="center", va="center", fontsize=12)
-
-    if not people:
-        ax.text(cx, cy, "(empty)", ha="center", va="center")
-        return
-
-    positions = circle_positions(len(people), center, radius)
-
-    for i, person in enumerate(people):
-        x, y = positions[i]
-        is_pointer = (i == 0)
-
-        ax.scatter(x, y, s=250 if is_pointer else 150)
-        ax.text(x, y, str(person), ha="center", va="center", color="white")
-
-        if is_pointer:
-            ax.scatter(x, y, s=450, facecolors="none", linewidths=2)
+    return {
+        "center": center,
+        "radius": radius,
+        "outline": outline,
+        "label": ax.text(cx, cy + radius + 0.35, "", ha="center", va="center", fontsize=12),
+        "empty": ax.text(cx, cy, "(empty)", ha="center", va="center", visible=False),
+        "people": ax.scatter(np.zeros(capacity), np.zeros(capacity)),
+        "pointer": ax.scatter([cx], [cy], s=450, facecolors="none", edgecolors="black", linewidths=2),
+        "names": [ax.text(cx, cy, "", ha="center", va="center", color="white", visible=False)
+                  for _ in range(capacity)],
+    }
+
+
+def update_circle(artists, people, positions, label, active):
+    import numpy as np
+
+    artists["outline"].set_linewidth(3 if active else 1.5)
+    artists["label"].set_text(label + (" (TURN)" if active else ""))
+
+    count = len(people)
+    artists["empty"].set_visible(count == 0)
+    artists["pointer"].set_visible(count > 0)
+
+    people_scatter = artists["people"]
+    people_scatter.set_offsets(positions if count else np.empty((0, 2)))
+    people_scatter.set_sizes([250] + [150] * (count - 1) if count else [])
+    people_scatter.set_facecolors([f"C{i % 10}" for i in range(count)])
+    if count:
+        artists["pointer"].set_offsets(positions[:1])
+
+    for i, name in enumerate(artists["names"]):
+        if i < count:
+            name.set_position(positions[i])
+            name.set_text(str(people[i]))
+        name.set_visible(i < count)
 
 
 # ----------------------------
@@ -55,12 +78,27 @@ def draw_circle(ax, people, center, radius, label, active):
 # ----------------------------
 class TracePlayer:
     def __init__(self, steps):
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import Button
+
         self.steps = steps
+        # Circle state is rebuilt by replaying/undoing steps, not stored per step
+        self.replay = TraceReplay(steps)
+        self.num_steps = self.replay.num_steps
         self.index = 0
+        self._layout_cache = {}
 
         self.fig, self.ax = plt.subplots(figsize=(10, 6))
         self.ax.set_aspect("equal")
         self.ax.axis("off")
+        self.ax.set_xlim(-4, 4)
+        self.ax.set_ylim(-2.6, 2.6)
+
+        self.status = self.ax.text(0.5, 0.97, "",
+                                   transform=self.ax.transAxes,
+                                   ha="center", va="center", fontsize=13)
+        self.circle_a = make_circle_artists(self.ax, len(self.replay.A), (-2.2, 0.0), 1.2)
+        self.circle_b = make_circle_artists(self.ax, len(self.replay.B), (2.2, 0.0), 1.2)
 
         # Leave space for buttons
         plt.subplots_adjust(bottom=0.15)
@@ -80,8 +118,15 @@ class TracePlayer:
 
         self.draw()
 
+    def _positions(self, size, center, radius):
+        # Circles only shrink, so each size is laid out at most once per run
+        key = (size, center, radius)
+        if key not in self._layout_cache:
+            self._layout_cache[key] = circle_positions(size, center, radius)
+        return self._layout_cache[key]
+
     def next_step(self, _event=None):
-        self.index = min(self.index + 1, len(self.steps) - 1)
+        self.index = min(self.index + 1, self.num_steps - 1)
         self.draw()
 
     def prev_step(self, _event=None):
@@ -90,32 +135,25 @@ class TracePlayer:
 
     def reset(self, _event=None):
         self.index = 0
+        self.replay.reset()
         self.draw()
 
     def draw(self):
-        self.ax.clear()
-        self.ax.set_aspect("equal")
-        self.ax.axis("off")
+        turn = chr(self.steps["turn"][self.index])
+        eliminated = self.steps["eliminated"][self.index]
+        phase = PHASES[self.steps["phase"][self.index]]
 
-        step = self.steps[self.index]
-        turn = step.get("turn", "?")
-        eliminated = step.get("eliminated", None)
-        phase = step.get("phase", "main")
-        A = step.get("A", [])
-        B = step.get("B", [])
+        # Each step shows the circles AFTER its elimination
+        self.replay.seek(self.index + 1)
 
-        status = f"Step {self.index+1}/{len(self.steps)} | Phase: {phase} | Turn: {turn} | Eliminated: {eliminated}"
-        self.ax.text(0.5, 0.97, status,
-                     transform=self.ax.transAxes,
-                     ha="center", va="center", fontsize=13)
+        status = f"Step {self.index+1}/{self.num_steps} | Phase: {phase} | Turn: {turn} | Eliminated: {eliminated}"
+        self.status.set_text(status)
 
-        draw_circle(self.ax, A, (-2.2, 0.0), 1.2,
-                    f"Circle A (size={len(A)})", active=(turn == "A"))
-        draw_circle(self.ax, B, (2.2, 0.0), 1.2,
-                    f"Circle B (size={len(B)})", active=(turn == "B"))
-
-        self.ax.set_xlim(-4, 4)
-        self.ax.set_ylim(-2.6, 2.6)
+        for name, people, artists in (("A", self.replay.A, self.circle_a),
+                                      ("B", self.replay.B, self.circle_b)):
+            positions = self._positions(len(people), artists["center"], artists["radius"])
+            update_circle(artists, people, positions,
+                          f"Circle {name} (size={len(people)})", active=(turn == name))
 
         self.fig.canvas.draw_idle()
 
@@ -123,6 +161,8 @@ class TracePlayer:
 # Main Runner
 # ----------------------------
 def main():
+    import matplotlib.pyplot as plt
+
     n = 10
     if len(sys.argv) > 1:
         n = int(sys.argv[1])